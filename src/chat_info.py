@@ -4,20 +4,89 @@ Extracts chat room names, participants info from chatListInfo.edb
 Supports searching by friend name or group chat name
 
 Fixed: 2025-12-09
-- Added file copy to avoid DB lock issues
 - Added chat name extraction from chatListInfo.edb
 """
 import sqlite3
 import json
+import re
 import os
 import sys
-import shutil
 import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
 from datetime import datetime
 
-from .registry import get_chat_data_path, list_chat_files, get_kakaotalk_user_dir
+from .registry import (
+    get_chat_data_path,
+    list_chat_files,
+    get_kakaotalk_user_dir,
+    invalidate_registry_caches,
+)
+from .keywords import COMMON_TODO_KEYWORDS, COMMON_URGENT_KEYWORDS, build_keyword_matcher
+
+
+# Max number of per-chat todo lists kept by TodoExtractor
+TODO_CACHE_SIZE = 64
+
+
+def _first_field(msg, *fields) -> Any:
+    """
+    Return the first non-empty field of a message.
+    Works for both dicts and sqlite3.Row.
+    """
+    keys = msg.keys()
+    for field in fields:
+        if field in keys and msg[field]:
+            return msg[field]
+    return ""
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """
+    (mtime_ns, size) of a path for cache invalidation, or None if missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass(frozen=True, slots=True)
+class ChatRoom:
+    """
+    A chat room record (chatLogs_{chat_id}.edb + name from chatListInfo).
+    Serialize with dataclasses.asdict.
+    """
+    chat_id: str
+    file_path: str
+    file_size: int
+    last_modified: str
+    name: str
+    type: str = "unknown"
+    member_count: int = 0
+
+
+def _chat_room_from_file(chat_file: Dict[str, Any], chat_names: Dict[str, str]) -> ChatRoom:
+    """
+    Build a ChatRoom from a list_chat_files() entry and the chat name map.
+    """
+    chat_id = chat_file["chat_id"]
+
+    # Try to get name from DB, fallback to ID-based name
+    name = chat_names.get(chat_id, f"Chat_{chat_id[-6:]}")
+
+    return ChatRoom(
+        chat_id=chat_id,
+        file_path=chat_file["path"],
+        file_size=chat_file["size"],
+        last_modified=datetime.fromtimestamp(chat_file["modified"]).isoformat(),
+        name=name,
+    )
 
 
 class ChatInfoManager:
@@ -25,134 +94,111 @@ class ChatInfoManager:
     Manages chat room information and message retrieval.
     """
 
+    # {chat_id: name} from chatListInfo.edb, keyed by its mtime + size
+    _names_cache_path = Path(tempfile.gettempdir()) / "kakao_chatnames.json"
+
     def __init__(self, decryptor=None):
         self.chat_data_path = get_chat_data_path()
         self.user_dir = get_kakaotalk_user_dir()
         self.decryptor = decryptor
-        self._chat_list_cache = None
+        # (cache_key, value) tuple; see _get_chat_names_from_db
         self._chat_names_cache = None
+        # Chat names (in chat list order) the name index below was built from
+        self._indexed_names = None
+        self._names_lower = []
+        self._names_index = {}
 
     def get_chat_list_info_path(self) -> Optional[str]:
-        """Get path to chatListInfo.edb"""
+        """Get path to chatListInfo.edb (existence is checked by the opener)"""
         if not self.chat_data_path:
             return None
-        path = Path(self.chat_data_path) / "chatListInfo.edb"
-        return str(path) if path.exists() else None
-
-    def _copy_file_safely(self, src_path: str) -> Optional[str]:
-        """
-        Copy a file to temp directory to avoid lock issues.
-        Returns path to the copied file.
-        """
-        try:
-            # Create temp file with same extension
-            suffix = Path(src_path).suffix
-            fd, temp_path = tempfile.mkstemp(suffix=suffix)
-            os.close(fd)
-
-            # Copy the file
-            shutil.copy2(src_path, temp_path)
-            return temp_path
-        except Exception as e:
-            print(f"Error copying file {src_path}: {e}", file=sys.stderr)
-            return None
+        return str(Path(self.chat_data_path) / "chatListInfo.edb")
 
-    def _read_sqlite_safely(self, db_path: str, query: str) -> List[Dict]:
+    def _decrypt_and_query(self, edb_path: str, query: str) -> Iterator[Dict]:
         """
-        Copy SQLite file and read from copy to avoid lock issues.
+        Decrypt EDB and execute query on the decryptor's cached connection.
+        Rows are yielded as they are stepped, not materialized up front;
+        the connection's lock is held until the generator is exhausted.
         """
-        temp_path = self._copy_file_safely(db_path)
-        if not temp_path:
-            return []
+        if not self.decryptor:
+            return
 
         try:
-            conn = sqlite3.connect(temp_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            with self.decryptor.locked_connection(edb_path) as conn:
+                if not conn:
+                    return
 
-            cursor.execute(query)
-            results = [dict(row) for row in cursor.fetchall()]
+                for row in conn.execute(query):
+                    yield dict(row)
 
-            conn.close()
-            return results
         except Exception as e:
-            print(f"Error reading {db_path}: {e}", file=sys.stderr)
-            return []
-        finally:
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+            print(f"Error querying {edb_path}: {e}", file=sys.stderr)
 
-    def _decrypt_and_query(self, edb_path: str, query: str) -> List[Dict]:
+    def _load_names_cache(self, source: str, key: List[int]) -> Optional[Dict[str, str]]:
         """
-        Copy, decrypt EDB and execute query.
+        Load cached chat names if they were built from the same
+        chatListInfo.edb (path, mtime, size).
         """
-        if not self.decryptor:
-            return []
-
-        # First copy the file to avoid lock
-        temp_edb = self._copy_file_safely(edb_path)
-        if not temp_edb:
-            return []
-
         try:
-            temp_db = self.decryptor.decrypt_to_temp_file(temp_edb)
-            if not temp_db:
-                return []
-
-            try:
-                conn = sqlite3.connect(temp_db)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
-                cursor.execute(query)
-                results = [dict(row) for row in cursor.fetchall()]
+            with open(self._names_cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
 
-                conn.close()
-                return results
+        # Valid JSON of the wrong shape is treated like a missing cache
+        if not isinstance(data, dict):
+            return None
+        if data.get("source") != source or data.get("key") != key:
+            return None
+        names = data.get("names")
+        return names if isinstance(names, dict) else None
 
-            except Exception as e:
-                print(f"Error querying {edb_path}: {e}", file=sys.stderr)
-                return []
-            finally:
-                if os.path.exists(temp_db):
-                    try:
-                        os.remove(temp_db)
-                    except:
-                        pass
-        finally:
-            if os.path.exists(temp_edb):
-                try:
-                    os.remove(temp_edb)
-                except:
-                    pass
+    def _save_names_cache(self, source: str, key: List[int], names: Dict[str, str]) -> None:
+        """
+        Atomically write chat names to the on-disk cache.
+        """
+        cache_dir = str(self._names_cache_path.parent)
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix='.json', dir=cache_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"source": source, "key": key, "names": names}, f, ensure_ascii=False)
+            os.replace(temp_path, self._names_cache_path)
+        except OSError as e:
+            print(f"Error writing chat name cache: {e}", file=sys.stderr)
 
     def _get_chat_names_from_db(self) -> Dict[str, str]:
         """
         Get chat room names from chatListInfo.edb.
         Returns dict of {chat_id: chat_name}
         """
-        if self._chat_names_cache:
-            return self._chat_names_cache
-
         chat_list_path = self.get_chat_list_info_path()
         if not chat_list_path:
             return {}
 
+        # Skip decrypt (and brute force) if chatListInfo.edb is unchanged
+        try:
+            stat = os.stat(chat_list_path)
+        except FileNotFoundError:
+            return {}
+        cache_key = [stat.st_mtime_ns, stat.st_size]
+        if self._chat_names_cache and self._chat_names_cache[0] == (chat_list_path, cache_key):
+            return self._chat_names_cache[1]
+
+        cached = self._load_names_cache(chat_list_path, cache_key)
+        if cached is not None:
+            self._chat_names_cache = ((chat_list_path, cache_key), cached)
+            return cached
+
         if not self.decryptor:
             return {}
 
         # Try to get chat names
         try:
-            results = self._decrypt_and_query(
+            chat_names = {}
+            for row in self._decrypt_and_query(
                 chat_list_path,
                 "SELECT * FROM chatRooms LIMIT 1000"
-            )
-
-            chat_names = {}
-            for row in results:
+            ):
                 chat_id = str(row.get("chatId", row.get("id", "")))
 
                 # Try different column names for chat name
@@ -168,7 +214,9 @@ class ChatInfoManager:
                 if chat_id and name:
                     chat_names[chat_id] = name
 
-            self._chat_names_cache = chat_names
+            if chat_names:
+                self._chat_names_cache = ((chat_list_path, cache_key), chat_names)
+                self._save_names_cache(chat_list_path, cache_key, chat_names)
             return chat_names
 
         except Exception as e:
@@ -176,49 +224,81 @@ class ChatInfoManager:
 
         # Fallback: try to read table structure
         try:
-            results = self._decrypt_and_query(
-                chat_list_path,
-                "SELECT name FROM sqlite_master WHERE type='table'"
-            )
-            print(f"Tables in chatListInfo: {[r.get('name') for r in results]}", file=sys.stderr)
+            tables = [
+                r.get('name') for r in self._decrypt_and_query(
+                    chat_list_path,
+                    "SELECT name FROM sqlite_master WHERE type='table'"
+                )
+            ]
+            print(f"Tables in chatListInfo: {tables}", file=sys.stderr)
         except:
             pass
 
         return {}
 
-    def get_all_chat_rooms(self) -> List[Dict]:
+    def get_all_chat_rooms(self) -> List[ChatRoom]:
         """
         Get all chat rooms with their names and IDs.
-        Returns list of {chat_id, name, type, member_count, last_message_time}
+        Returns list of ChatRoom, most recently modified first
+
+        The chat files are rescanned on every call, since sizes, mtimes
+        and order change whenever a chat log is written.
         """
-        if self._chat_list_cache:
-            return self._chat_list_cache
+        chat_rooms = self._build_chat_rooms()
+
+        # Lowercased names + exact-match index for search_chat_by_name,
+        # rebuilt only when a chat is added, removed, renamed or reordered
+        names = tuple(c.name for c in chat_rooms)
+        if names != self._indexed_names:
+            self._names_lower = [name.lower() for name in names]
+            self._names_index = defaultdict(list)
+            for idx, name_lower in enumerate(self._names_lower):
+                self._names_index[name_lower].append(idx)
+            self._indexed_names = names
 
-        chat_files = list_chat_files()
-        chat_names = self._get_chat_names_from_db()
+        return chat_rooms
+
+    def _build_chat_rooms(self, limit: Optional[int] = None) -> List[ChatRoom]:
+        """
+        Build ChatRoom records for the `limit` most recent chat files
+        (all of them if None), most recently modified first.
+        """
+        # Filesystem scan (I/O) and name decrypt (CPU, GIL released in AES)
+        # overlap instead of running back to back
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            files_future = executor.submit(list_chat_files, limit)
+            names_future = executor.submit(self._get_chat_names_from_db)
+            chat_files = files_future.result()
+            chat_names = names_future.result()
 
         # Build info from file system + names from DB
-        chat_rooms = []
-        for cf in chat_files:
-            chat_id = cf["chat_id"]
-
-            # Try to get name from DB, fallback to ID-based name
-            name = chat_names.get(chat_id, f"Chat_{chat_id[-6:]}")
-
-            chat_rooms.append({
-                "chat_id": chat_id,
-                "file_path": cf["path"],
-                "file_size": cf["size"],
-                "last_modified": datetime.fromtimestamp(cf["modified"]).isoformat(),
-                "name": name,
-                "type": "unknown",
-                "member_count": 0,
-            })
+        return [_chat_room_from_file(cf, chat_names) for cf in chat_files]
 
-        self._chat_list_cache = chat_rooms
-        return chat_rooms
+    def invalidate(self) -> None:
+        """
+        Drop all cached chat data (user/chat_data paths, chat list, names,
+        decrypted files and credentials) so the next call re-reads
+        everything.
+        """
+        self._chat_names_cache = None
+        self._indexed_names = None
+        self._names_lower = []
+        self._names_index = {}
 
-    def search_chat_by_name(self, name: str, exact: bool = False) -> List[Dict]:
+        # Re-resolve the paths, e.g. if KakaoTalk logged in after startup
+        invalidate_registry_caches()
+        self.chat_data_path = get_chat_data_path()
+        self.user_dir = get_kakaotalk_user_dir()
+
+        try:
+            os.remove(self._names_cache_path)
+        except OSError:
+            pass
+
+        if self.decryptor:
+            self.decryptor.clear_cache()
+
+    def search_chat_by_name(self, name: str, exact: bool = False) -> List[ChatRoom]:
         """
         Search chat rooms by name (friend name or group chat name).
 
@@ -230,60 +310,83 @@ class ChatInfoManager:
             List of matching chat rooms
         """
         all_chats = self.get_all_chat_rooms()
+        name_lower = name.lower()
 
         if exact:
-            return [c for c in all_chats if c.get("name", "").lower() == name.lower()]
+            return [all_chats[idx] for idx in self._names_index.get(name_lower, [])]
         else:
-            return [c for c in all_chats if name.lower() in c.get("name", "").lower()]
+            return [
+                all_chats[idx]
+                for idx, chat_name in enumerate(self._names_lower)
+                if name_lower in chat_name
+            ]
 
-    def get_recent_chats(self, limit: int = 10) -> List[Dict]:
+    def get_recent_chats(self, limit: int = 10) -> List[ChatRoom]:
         """
         Get most recently active chat rooms.
+        Only the `limit` most recent files get ChatRoom records.
         """
-        all_chats = self.get_all_chat_rooms()
-        return all_chats[:limit]
+        return self._build_chat_rooms(limit)
+
+    def _chat_log_path(self, chat_id: str) -> Optional[str]:
+        """Get path to chatLogs_{chat_id}.edb (existence is checked by the opener)"""
+        if not self.chat_data_path:
+            return None
+        return str(Path(self.chat_data_path) / f"chatLogs_{chat_id}.edb")
 
     def get_messages_from_chat(self, chat_id: str, limit: int = 100) -> List[Dict]:
         """
         Get messages from a specific chat room.
-        Copies file first to avoid lock issues.
         """
-        if not self.chat_data_path:
-            return []
-
-        edb_path = Path(self.chat_data_path) / f"chatLogs_{chat_id}.edb"
-        if not edb_path.exists():
+        edb_path = self._chat_log_path(chat_id)
+        if not edb_path:
             return []
 
         if not self.decryptor:
             return []
 
-        # Copy file first to avoid lock
-        temp_edb = self._copy_file_safely(str(edb_path))
-        if not temp_edb:
-            return []
-
+        # Read the original path so the decryptor's cache can be reused
         try:
-            messages = self.decryptor.get_messages_from_edb(temp_edb)
-            return messages[:limit] if limit else messages
-        finally:
-            if os.path.exists(temp_edb):
-                try:
-                    os.remove(temp_edb)
-                except:
-                    pass
+            return self.decryptor.get_messages_from_edb(edb_path, limit=limit or 1000)
+        except FileNotFoundError:
+            return []
 
     def search_messages(self, chat_id: str, keyword: str, limit: int = 50) -> List[Dict]:
         """
         Search messages in a chat room by keyword.
+        The filter runs inside SQLite; falls back to filtering in Python
+        if the chat log schema lacks message/content columns.
         """
+        edb_path = self._chat_log_path(chat_id)
+        if edb_path and self.decryptor:
+            try:
+                table_info = self.decryptor.query_messages(edb_path, "PRAGMA table_info(chatLogs)")
+                if table_info is None:
+                    # Decrypt failed; the Python fallback would only retry it
+                    return []
+                columns = {row["name"] for row in table_info}
+                text_columns = [c for c in ("message", "content") if c in columns]
+                if text_columns and "sendAt" in columns:
+                    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    where = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in text_columns)
+                    return self.decryptor.query_messages(
+                        edb_path,
+                        f"SELECT * FROM chatLogs WHERE {where} ORDER BY sendAt DESC LIMIT ?",
+                        (*[f"%{escaped}%"] * len(text_columns), limit),
+                    ) or []
+            except FileNotFoundError:
+                return []
+            except sqlite3.Error as e:
+                print(f"Falling back to Python search for {chat_id}: {e}", file=sys.stderr)
+
         messages = self.get_messages_from_chat(chat_id, limit=1000)
+        keyword_lower = keyword.lower()
 
         results = []
         for msg in messages:
-            content = msg.get("message", "") or msg.get("content", "") or ""
-            if keyword.lower() in content.lower():
-                results.append(msg)
+            content = _first_field(msg, "message", "content")
+            if keyword_lower in content.lower():
+                results.append(dict(msg))
                 if len(results) >= limit:
                     break
 
@@ -297,26 +400,71 @@ class TodoExtractor:
     """
 
     # Korean todo keywords
-    TODO_KEYWORDS = [
-        "해야", "해줘", "해주세요", "부탁", "요청",
-        "할 일", "할일", "TODO", "todo",
-        "까지", "마감", "deadline",
-        "확인", "검토", "리뷰",
-        "보내", "전달", "공유",
-        "작성", "준비", "완료",
-        "미팅", "회의", "콜",
-        "연락", "답장", "회신",
-        "수정", "변경", "업데이트",
-    ]
+    TODO_KEYWORDS = list(COMMON_TODO_KEYWORDS)
 
     # Urgency keywords
-    URGENT_KEYWORDS = [
-        "급", "빨리", "ASAP", "asap", "긴급",
-        "오늘", "내일", "당장", "바로",
-    ]
+    URGENT_KEYWORDS = list(COMMON_URGENT_KEYWORDS)
+
+    # One pass per message instead of one substring scan per keyword.
+    # The lookahead reports matches at every position so overlapping
+    # keywords are all found; _TODO_HITS expands each match to the keywords
+    # nested in it ("완료" in "완료해"). Reported keywords keep
+    # TODO_KEYWORDS order via _TODO_ORDER.
+    TODO_RE, _TODO_HITS = build_keyword_matcher(TODO_KEYWORDS)
+    _TODO_ORDER = {kw: i for i, kw in enumerate(TODO_KEYWORDS)}
+    URGENT_RE = re.compile("|".join(re.escape(k) for k in URGENT_KEYWORDS))
 
     def __init__(self):
-        pass
+        # (chat_id, limit, chat log mtime_ns, size) -> todos, LRU order.
+        # Shared by worker threads (get_urgent_todos), hence the lock.
+        self._todo_cache: "OrderedDict[Tuple[str, int, int, int], List[Dict]]" = OrderedDict()
+        self._todo_cache_lock = threading.Lock()
+
+    def _cached_todos(
+        self,
+        chat_manager: ChatInfoManager,
+        chat_id: str,
+        limit: int,
+        compute: Callable[[], Optional[List[Dict]]]
+    ) -> List[Dict]:
+        """
+        Return the cached todos for a chat if its log file is unchanged,
+        else compute() and cache them. compute() returns None when no
+        messages could be read (missing credentials, failed decrypt);
+        that result is not cached, so the next call retries the read.
+        Cached todo dicts are shared, so callers must copy before
+        modifying them.
+        """
+        edb_path = chat_manager._chat_log_path(chat_id)
+        stat_key = _stat_key(edb_path) if edb_path else None
+        if stat_key is None:
+            return compute() or []
+
+        cache_key = (chat_id, limit, *stat_key)
+        with self._todo_cache_lock:
+            todos = self._todo_cache.get(cache_key)
+            if todos is not None:
+                self._todo_cache.move_to_end(cache_key)
+                return list(todos)
+
+        # Extraction runs outside the lock so chats are scanned in parallel
+        todos = compute()
+        if todos is None:
+            return []
+
+        with self._todo_cache_lock:
+            self._todo_cache[cache_key] = todos
+            while len(self._todo_cache) > TODO_CACHE_SIZE:
+                self._todo_cache.popitem(last=False)
+
+        return list(todos)
+
+    def clear_cache(self) -> None:
+        """
+        Drop all cached todo lists.
+        """
+        with self._todo_cache_lock:
+            self._todo_cache.clear()
 
     def extract_todos_from_messages(self, messages: List[Dict]) -> List[Dict]:
         """
@@ -325,28 +473,23 @@ class TodoExtractor:
         todos = []
 
         for msg in messages:
-            content = msg.get("message", "") or msg.get("content", "") or ""
+            content = _first_field(msg, "message", "content")
             if not content:
                 continue
 
             # Check for todo keywords
-            is_todo = False
-            matched_keywords = []
-
-            for keyword in self.TODO_KEYWORDS:
-                if keyword in content:
-                    is_todo = True
-                    matched_keywords.append(keyword)
-
-            if not is_todo:
+            matched = self.TODO_RE.findall(content)
+            if not matched:
                 continue
+            found = set().union(*map(self._TODO_HITS.__getitem__, matched))
+            matched_keywords = sorted(found, key=self._TODO_ORDER.__getitem__)
 
             # Check urgency
-            is_urgent = any(kw in content for kw in self.URGENT_KEYWORDS)
+            is_urgent = bool(self.URGENT_RE.search(content))
 
             # Extract sender info
-            sender = msg.get("authorId", "") or msg.get("sender", "") or "Unknown"
-            timestamp = msg.get("sendAt", "") or msg.get("timestamp", "")
+            sender = _first_field(msg, "authorId", "sender") or "Unknown"
+            timestamp = _first_field(msg, "sendAt", "timestamp")
 
             todos.append({
                 "content": content,
@@ -354,11 +497,21 @@ class TodoExtractor:
                 "timestamp": timestamp,
                 "is_urgent": is_urgent,
                 "keywords": matched_keywords,
-                "original_message": msg,
+                "original_message": dict(msg),
             })
 
         return todos
 
+    @staticmethod
+    def partition_by_urgency(todos: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Split todos into (urgent, normal) in a single pass, keeping order.
+        """
+        urgent, normal = [], []
+        for todo in todos:
+            (urgent if todo.get("is_urgent") else normal).append(todo)
+        return urgent, normal
+
     def extract_todos_from_chat(
         self,
         chat_manager: ChatInfoManager,
@@ -367,9 +520,17 @@ class TodoExtractor:
     ) -> List[Dict]:
         """
         Extract todos from a specific chat room.
+        Results are cached until the chat's log file changes.
         """
-        messages = chat_manager.get_messages_from_chat(chat_id, limit=limit)
-        return self.extract_todos_from_messages(messages)
+        limit = limit or 1000
+
+        def compute() -> Optional[List[Dict]]:
+            messages = chat_manager.get_messages_from_chat(chat_id, limit=limit)
+            if not messages:
+                return None
+            return self.extract_todos_from_messages(messages)
+
+        return self._cached_todos(chat_manager, chat_id, limit, compute)
 
     def search_and_extract_todos(
         self,
@@ -391,12 +552,12 @@ class TodoExtractor:
 
         # Use the most recently modified matching chat
         chat = matching_chats[0]
-        todos = self.extract_todos_from_chat(chat_manager, chat["chat_id"], limit)
+        todos = self.extract_todos_from_chat(chat_manager, chat.chat_id, limit)
 
         return {
             "success": True,
-            "chat_name": chat.get("name", chat["chat_id"]),
-            "chat_id": chat["chat_id"],
+            "chat_name": chat.name or chat.chat_id,
+            "chat_id": chat.chat_id,
             "todos": todos,
             "total_found": len(todos),
         }
@@ -410,4 +571,4 @@ if __name__ == "__main__":
     print(f"Found {len(chats)} chat rooms")
 
     for chat in chats[:5]:
-        print(f"  - {chat['chat_id']}: {chat['name']}")
+        print(f"  - {chat.chat_id}: {chat.name}")
@@ -2,18 +2,46 @@
 KakaoTalk EDB Decryption Module
 Decrypts chatLogs_*.edb files using AES-CBC
 """
+import atexit
 import base64
 import hashlib
+import mmap
+import multiprocessing
 import sqlite3
 import tempfile
 import os
 import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Sequence, Iterator
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
 
-from .registry import get_network_interface_keys, get_kakaotalk_device_info
+from .registry import (
+    get_network_interface_keys,
+    get_kakaotalk_device_info,
+    invalidate_registry_caches,
+)
+from .sqlite_utils import connect_readonly
+
+
+# userIds per brute-force work unit. Small enough that a hit in a low shard
+# cancels most of the remaining work, large enough to amortize IPC.
+USER_ID_SHARD_SIZE = 2500
+
+# Max number of decrypted temp DBs (and open connections) kept by KakaoDecryptor
+DECRYPTED_CACHE_SIZE = 8
+
+# Decrypted temp DBs are named {prefix}{pid}_*.db so files left behind by
+# a killed process (atexit never ran) can be found and removed later
+DECRYPTED_TEMP_PREFIX = "kakao_dec_"
+
+# Set in brute-force worker processes by _init_user_id_worker; once the
+# event is set, running shards stop instead of finishing their range.
+_stop_event = None
 
 
 def generate_pragma(uuid: str, model_name: str, serial_number: str, key: bytes) -> str:
@@ -33,27 +61,35 @@ def generate_key_and_iv(pragma: str, user_id: str) -> Tuple[bytes, bytes]:
     """
     Generate AES key and IV from pragma and userId.
     """
-    key = pragma + user_id
-    while len(key) < 512:
-        key += key
-    key = key[:512]
-    key_hash = hashlib.md5(key.encode()).digest()
+    base = (pragma + user_id).encode()
+    # Repeat to 512 bytes in one allocation (same as doubling then truncating)
+    key = (base * -(-512 // len(base)))[:512]
+    key_hash = hashlib.md5(key).digest()
     iv = hashlib.md5(base64.b64encode(key_hash)).digest()
     return key_hash, iv
 
 
+def decrypt_database_into(out, key: bytes, iv: bytes, enc_db) -> None:
+    """
+    Decrypt EDB database into a preallocated writable buffer
+    (bytearray / mmap) of the same length as enc_db.
+
+    Every 4096-byte page restarts CBC from the same IV, so pages can't be
+    merged into one larger decrypt call.
+    """
+    with memoryview(out) as out_view, memoryview(enc_db) as enc_view:
+        for i in range(0, len(enc_db), 4096):
+            cipher = AES.new(key, AES.MODE_CBC, iv)
+            cipher.decrypt(enc_view[i:i+4096], output=out_view[i:i+4096])
+
+
 def decrypt_database(key: bytes, iv: bytes, enc_db: bytes) -> bytes:
     """
     Decrypt EDB database using AES-CBC with 4096 byte blocks.
     """
-    dec_db = b''
-    i = 0
-    while i < len(enc_db):
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        decrypted_data = cipher.decrypt(enc_db[i:i+4096])
-        dec_db += decrypted_data
-        i += 4096
-    return dec_db
+    out = bytearray(len(enc_db))
+    decrypt_database_into(out, key, iv, enc_db)
+    return bytes(out)
 
 
 def verify_sqlite_header(data: bytes) -> bool:
@@ -64,24 +100,189 @@ def verify_sqlite_header(data: bytes) -> bool:
     return data[:16] == b'SQLite format 3\x00'
 
 
+def _init_user_id_worker(stop_event) -> None:
+    """
+    ProcessPoolExecutor initializer: share the stop event with the worker.
+    """
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _check_range(pragma: str, enc_db_head: bytes, lo: int, hi: int) -> Optional[str]:
+    """
+    Try userIds in [lo, hi) and return the first one that yields a valid
+    SQLite header, or None.
+
+    Only the first 16-byte CBC block is decrypted per candidate -
+    that is all the SQLite header check needs. In a pool worker, gives up
+    early once another shard has found the userId.
+    """
+    # Hoist per-candidate work out of the loop
+    pragma_bytes = pragma.encode()
+    head = enc_db_head[:16]
+    md5 = hashlib.md5
+    b64encode = base64.b64encode
+    new_cipher = AES.new
+    mode_cbc = AES.MODE_CBC
+    stop_event = _stop_event
+
+    for user_id in range(lo, hi):
+        # Poll the stop event every 1024 candidates
+        if stop_event is not None and not user_id & 1023 and stop_event.is_set():
+            return None
+
+        user_id_str = str(user_id)
+        # Same derivation as generate_key_and_iv, on pre-encoded bytes
+        base = pragma_bytes + user_id_str.encode()
+        key_hash = md5((base * -(-512 // len(base)))[:512]).digest()
+        iv = md5(b64encode(key_hash)).digest()
+
+        if verify_sqlite_header(new_cipher(key_hash, mode_cbc, iv).decrypt(head)):
+            return user_id_str
+
+        if user_id % 10000 == 0:
+            print(f"Tried {user_id} userIds...", file=sys.stderr)
+
+    return None
+
+
 def find_user_id(pragma: str, enc_db: bytes, max_attempts: int = 100000) -> Optional[str]:
     """
     Find the correct userId by brute force.
     Try userId from 1 to max_attempts.
     """
-    for user_id in range(1, max_attempts + 1):
-        key, iv = generate_key_and_iv(pragma, str(user_id))
-        dec_db = decrypt_database(key, iv, enc_db[:4096])  # Only decrypt first block
+    return _check_range(pragma, enc_db[:16], 1, max_attempts + 1)
 
-        if verify_sqlite_header(dec_db):
-            return str(user_id)
 
-        if user_id % 10000 == 0:
-            print(f"Tried {user_id} userIds...", file=sys.stderr)
+def new_user_id_executor(stop_event) -> ProcessPoolExecutor:
+    """
+    Process pool for find_user_id_parallel whose workers watch `stop_event`
+    (a multiprocessing.Event).
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_user_id_worker,
+        initargs=(stop_event,),
+    )
+
+
+def find_user_id_parallel(
+    executor: ProcessPoolExecutor,
+    pragma: str,
+    enc_db: bytes,
+    max_attempts: int = 100000,
+    stop_event=None,
+) -> Optional[str]:
+    """
+    Same as find_user_id, but shards the userId range across a process pool.
+    Returns on the first hit; shards that have not started are cancelled.
+    With the executor's `stop_event` (see new_user_id_executor), running
+    shards are stopped too instead of finishing their range.
+    """
+    head = bytes(enc_db[:16])  # Only the header block is pickled to workers
+    if stop_event is not None:
+        stop_event.clear()
+    futures = [
+        executor.submit(_check_range, pragma, head, lo, min(lo + USER_ID_SHARD_SIZE, max_attempts + 1))
+        for lo in range(1, max_attempts + 1, USER_ID_SHARD_SIZE)
+    ]
+
+    try:
+        for future in as_completed(futures):
+            user_id = future.result()
+            if user_id:
+                return user_id
+    finally:
+        for future in futures:
+            future.cancel()
+        if stop_event is not None:
+            stop_event.set()
 
     return None
 
 
+def _close_and_remove(temp_path: str, conn: sqlite3.Connection) -> None:
+    """
+    Close a cached connection and delete its temp file, ignoring errors
+    (e.g. file still locked on Windows).
+    """
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Whether a process with this pid is still running.
+    """
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        kernel32.CloseHandle(handle)
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_temp_files() -> None:
+    """
+    Delete decrypted temp DBs whose owning process is gone.
+    """
+    try:
+        entries = os.scandir(tempfile.gettempdir())
+    except OSError:
+        return
+
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith(DECRYPTED_TEMP_PREFIX) and name.endswith(".db")):
+                continue
+            pid = name[len(DECRYPTED_TEMP_PREFIX):].partition("_")[0]
+            if not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class _DecryptedDB:
+    """
+    A cached decrypted EDB: temp file, its connection and a lock that
+    serializes use of the connection. Once closed, the entry is dead.
+    """
+
+    __slots__ = ("temp_path", "conn", "lock", "closed")
+
+    def __init__(self, temp_path: str, conn: sqlite3.Connection):
+        self.temp_path = temp_path
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def close(self) -> None:
+        # Waits for a query still running on the connection to finish
+        with self.lock:
+            self.closed = True
+            _close_and_remove(self.temp_path, self.conn)
+
+
 class KakaoDecryptor:
     """
     KakaoTalk EDB file decryptor.
@@ -91,6 +292,14 @@ class KakaoDecryptor:
         self.device_info = get_kakaotalk_device_info()
         self.network_keys = get_network_interface_keys()
         self._cached_credentials = None
+        # Guards the decrypted cache itself; each entry has its own lock for
+        # its connection, so chats decrypt and query in parallel.
+        self.lock = threading.RLock()
+        # Only one thread runs the userId brute force; the rest wait for it
+        self._credentials_lock = threading.Lock()
+        self._decrypted_cache: "OrderedDict[Tuple[str, int, int], _DecryptedDB]" = OrderedDict()
+        atexit.register(self._cleanup_decrypted_cache)
+        remove_stale_temp_files()
 
     def _find_working_credentials(self, enc_db: bytes) -> Optional[Dict]:
         """
@@ -99,6 +308,17 @@ class KakaoDecryptor:
         if self._cached_credentials:
             return self._cached_credentials
 
+        with self._credentials_lock:
+            return self._search_credentials(enc_db)
+
+    def _search_credentials(self, enc_db: bytes) -> Optional[Dict]:
+        """
+        Brute-force the credentials. Called with _credentials_lock held.
+        """
+        # Another thread may have found them while we waited for the lock
+        if self._cached_credentials:
+            return self._cached_credentials
+
         if not self.device_info:
             print("No device info found in registry", file=sys.stderr)
             return None
@@ -111,44 +331,73 @@ class KakaoDecryptor:
             print("Incomplete device info", file=sys.stderr)
             return None
 
-        # Try each network interface key
-        for net_key in self.network_keys:
-            key_bytes = bytes.fromhex(net_key)
-            if len(key_bytes) != 16:
-                continue
-
-            pragma = generate_pragma(uuid, model, serial, key_bytes)
-
-            # Try to find userId (brute force first 50000)
-            user_id = find_user_id(pragma, enc_db, max_attempts=50000)
-
-            if user_id:
-                self._cached_credentials = {
-                    "uuid": uuid,
-                    "model": model,
-                    "serial": serial,
-                    "network_key": net_key,
-                    "pragma": pragma,
-                    "user_id": user_id,
-                }
-                return self._cached_credentials
+        # Try each network interface key, sharding the userId search across cores.
+        # On a hit, the stop event ends the shards still running.
+        stop_event = multiprocessing.Event()
+        with new_user_id_executor(stop_event) as executor:
+            for net_key in self.network_keys:
+                key_bytes = bytes.fromhex(net_key)
+                if len(key_bytes) != 16:
+                    continue
+
+                pragma = generate_pragma(uuid, model, serial, key_bytes)
+
+                # Try to find userId (brute force first 50000)
+                user_id = find_user_id_parallel(
+                    executor, pragma, enc_db, max_attempts=50000, stop_event=stop_event
+                )
+
+                if user_id:
+                    self._cached_credentials = {
+                        "uuid": uuid,
+                        "model": model,
+                        "serial": serial,
+                        "network_key": net_key,
+                        "pragma": pragma,
+                        "user_id": user_id,
+                    }
+                    return self._cached_credentials
 
         return None
 
-    def decrypt_file(self, edb_path: str) -> Optional[bytes]:
+    def _map_edb(self, edb_path: str) -> Optional[mmap.mmap]:
         """
-        Decrypt an EDB file and return the decrypted SQLite database.
+        Map an EDB file read-only instead of slurping it;
+        pages are read on demand. Caller closes the map.
         """
         with open(edb_path, 'rb') as f:
-            enc_db = f.read()
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                print(f"Empty EDB file: {edb_path}", file=sys.stderr)
+                return None
 
-        creds = self._find_working_credentials(enc_db)
+    def _get_key_and_iv(self, enc_db, edb_path: str) -> Optional[Tuple[bytes, bytes]]:
+        """
+        Derive the AES key and IV for an EDB file.
+        """
+        creds = self._find_working_credentials(enc_db[:4096])
         if not creds:
             print(f"Could not find working credentials for {edb_path}", file=sys.stderr)
             return None
+        return generate_key_and_iv(creds["pragma"], creds["user_id"])
 
-        key, iv = generate_key_and_iv(creds["pragma"], creds["user_id"])
-        dec_db = decrypt_database(key, iv, enc_db)
+    def decrypt_file(self, edb_path: str) -> Optional[bytes]:
+        """
+        Decrypt an EDB file and return the decrypted SQLite database.
+        """
+        enc_db = self._map_edb(edb_path)
+        if enc_db is None:
+            return None
+
+        try:
+            key_iv = self._get_key_and_iv(enc_db, edb_path)
+            if not key_iv:
+                return None
+
+            dec_db = decrypt_database(*key_iv, enc_db)
+        finally:
+            enc_db.close()
 
         if not verify_sqlite_header(dec_db):
             print("Decryption failed - invalid SQLite header", file=sys.stderr)
@@ -156,32 +405,176 @@ class KakaoDecryptor:
 
         return dec_db
 
-    def decrypt_to_temp_file(self, edb_path: str) -> Optional[str]:
+    def _decrypt_to_new_temp_file(self, edb_path: str) -> Optional[str]:
         """
-        Decrypt EDB file and save to a temporary SQLite file.
-        Returns the path to the temp file.
+        Decrypt an EDB file page by page straight into a preallocated,
+        memory-mapped temp file. Only one copy of the data (the temp file's
+        page cache) exists at any time.
         """
-        dec_db = self.decrypt_file(edb_path)
-        if not dec_db:
+        enc_db = self._map_edb(edb_path)
+        if enc_db is None:
             return None
 
-        # Create temp file
-        fd, temp_path = tempfile.mkstemp(suffix='.db')
-        os.write(fd, dec_db)
-        os.close(fd)
+        try:
+            key_iv = self._get_key_and_iv(enc_db, edb_path)
+            if not key_iv:
+                return None
+
+            size = len(enc_db)
+            fd, temp_path = tempfile.mkstemp(
+                prefix=f"{DECRYPTED_TEMP_PREFIX}{os.getpid()}_", suffix='.db'
+            )
+            try:
+                # Reserve the space up front
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+
+                with mmap.mmap(fd, size) as out:
+                    decrypt_database_into(out, *key_iv, enc_db)
+                    valid = verify_sqlite_header(out[:16])
+            except BaseException:
+                os.close(fd)
+                os.remove(temp_path)
+                raise
+            os.close(fd)
+        finally:
+            enc_db.close()
+
+        if not valid:
+            print("Decryption failed - invalid SQLite header", file=sys.stderr)
+            os.remove(temp_path)
+            return None
 
         return temp_path
 
-    def get_messages_from_edb(self, edb_path: str) -> List[Dict]:
+    def _get_decrypted(self, edb_path: str) -> Optional[_DecryptedDB]:
         """
-        Decrypt EDB file and extract messages.
+        Decrypt EDB file to a temp SQLite file and open a long-lived
+        connection to it.
+
+        Entries are cached per (path, mtime, size) so repeated queries hit
+        SQLite's warm page cache. The least recently used entry is closed
+        and deleted once more than DECRYPTED_CACHE_SIZE are cached.
         """
-        temp_path = self.decrypt_to_temp_file(edb_path)
+        stat = os.stat(edb_path)
+        cache_key = (os.path.abspath(edb_path), stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            cached = self._decrypted_cache.get(cache_key)
+            if cached:
+                if os.path.exists(cached.temp_path):
+                    self._decrypted_cache.move_to_end(cache_key)
+                    return cached
+                del self._decrypted_cache[cache_key]
+        if cached:
+            cached.close()
+
+        temp_path = self._decrypt_to_new_temp_file(edb_path)
         if not temp_path:
-            return []
+            return None
+
+        conn = connect_readonly(temp_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        entry = _DecryptedDB(temp_path, conn)
+
+        evicted = []
+        with self.lock:
+            # Another thread decrypted the same file meanwhile; keep theirs
+            cached = self._decrypted_cache.get(cache_key)
+            if cached:
+                self._decrypted_cache.move_to_end(cache_key)
+                evicted.append(entry)
+                entry = cached
+            else:
+                self._decrypted_cache[cache_key] = entry
+                while len(self._decrypted_cache) > DECRYPTED_CACHE_SIZE:
+                    evicted.append(self._decrypted_cache.popitem(last=False)[1])
+
+        # Closing waits on the entry's lock, so do it outside self.lock
+        for old in evicted:
+            old.close()
+        return entry
+
+    def decrypt_to_temp_file(self, edb_path: str) -> Optional[str]:
+        """
+        Decrypt EDB file and save to a temporary SQLite file.
+        Returns the path to the temp file.
+
+        Temp files are cached and owned by the decryptor -
+        callers must not delete them.
+        """
+        entry = self._get_decrypted(edb_path)
+        return entry.temp_path if entry else None
+
+    @contextmanager
+    def locked_connection(self, edb_path: str) -> Iterator[Optional[sqlite3.Connection]]:
+        """
+        Get the cached read-only connection (row_factory = sqlite3.Row)
+        to a decrypted EDB file, holding the entry's own lock for the
+        duration of the block so the connection cannot be evicted or used
+        concurrently. Other chats' connections stay usable meanwhile.
+        Callers must not close it.
+        """
+        while True:
+            entry = self._get_decrypted(edb_path)
+            if not entry:
+                yield None
+                return
+
+            with entry.lock:
+                # Evicted between lookup and lock; look it up again
+                if entry.closed:
+                    continue
+                yield entry.conn
+                return
+
+    def clear_cache(self):
+        """
+        Forget cached credentials and drop all decrypted temp files.
+        Device info and network keys are re-read from the registry.
+        """
+        with self.lock:
+            self._cached_credentials = None
+
+            invalidate_registry_caches()
+            self.device_info = get_kakaotalk_device_info()
+            self.network_keys = get_network_interface_keys()
+        self._cleanup_decrypted_cache()
+
+    def _cleanup_decrypted_cache(self):
+        """
+        Close and remove all cached decrypted temp files.
+        """
+        with self.lock:
+            entries = list(self._decrypted_cache.values())
+            self._decrypted_cache.clear()
+        for entry in entries:
+            entry.close()
+
+    def query_messages(self, edb_path: str, sql: str, params: Sequence = ()) -> Optional[List[Dict]]:
+        """
+        Decrypt EDB file (cached) and run a parametrized query against it.
+        Returns None if the file could not be decrypted.
+        sqlite3 errors (e.g. missing table/column) are raised to the caller.
+        """
+        with self.locked_connection(edb_path) as conn:
+            if not conn:
+                return None
+
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def get_messages_from_edb(self, edb_path: str, limit: int = 1000) -> List[sqlite3.Row]:
+        """
+        Decrypt EDB file and extract up to `limit` most recent messages.
+        Rows are returned as sqlite3.Row (key access like a dict);
+        convert with dict(row) where JSON is needed.
+        """
+        with self.locked_connection(edb_path) as conn:
+            if not conn:
+                return []
 
-        try:
-            conn = sqlite3.connect(temp_path)
             cursor = conn.cursor()
 
             # Get table info
@@ -192,25 +585,18 @@ class KakaoDecryptor:
 
             # Try to find messages table (usually chatLogs or similar)
             for table_name, in tables:
+                remaining = limit - len(messages)
+                if remaining <= 0:
+                    break
                 if 'log' in table_name.lower() or 'message' in table_name.lower():
                     try:
-                        cursor.execute(f"SELECT * FROM {table_name} ORDER BY sendAt DESC LIMIT 1000")
-                        columns = [desc[0] for desc in cursor.description]
-
-                        for row in cursor.fetchall():
-                            msg = dict(zip(columns, row))
-                            messages.append(msg)
+                        cursor.execute(f"SELECT * FROM {table_name} ORDER BY sendAt DESC LIMIT ?", (remaining,))
+                        messages.extend(cursor.fetchall())
                     except Exception as e:
                         print(f"Error reading table {table_name}: {e}", file=sys.stderr)
 
-            conn.close()
             return messages
 
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
 
 if __name__ == "__main__":
     decryptor = KakaoDecryptor()
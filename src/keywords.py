@@ -0,0 +1,46 @@
+"""
+KakaoTalk Todo Keywords
+Keyword tables and the one-pass keyword matcher shared by the
+DB-backed TodoExtractor and the export .txt parser
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Tuple
+
+
+# Todo keywords common to both extractors (Korean + English)
+COMMON_TODO_KEYWORDS = (
+    "해야", "해줘", "해주세요", "부탁", "요청",
+    "할 일", "할일", "TODO", "todo",
+    "까지", "마감", "deadline",
+    "확인", "검토", "리뷰",
+    "보내", "전달", "공유",
+    "작성", "준비", "완료",
+    "미팅", "회의", "콜",
+    "연락", "답장", "회신",
+    "수정", "변경", "업데이트",
+)
+
+# Urgency keywords common to both extractors
+COMMON_URGENT_KEYWORDS = (
+    "급", "빨리", "ASAP", "asap", "긴급",
+    "오늘", "내일", "당장", "바로",
+)
+
+
+def build_keyword_matcher(keywords: Iterable[str]) -> Tuple[re.Pattern, Dict[str, FrozenSet[str]]]:
+    """
+    Build a one-pass matcher for a keyword list.
+    Returns (pattern, hits) where pattern.findall() yields the longest
+    keyword starting at each position and hits maps it to every keyword
+    contained in it.
+    """
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    # Cheap first-character gate: positions that can't start any keyword
+    # are rejected by one charset test before the alternation is tried
+    first_chars = "".join(sorted({kw[0] for kw in ordered}))
+    pattern = re.compile(
+        "(?=[" + re.escape(first_chars) + "])"
+        "(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))"
+    )
+    hits = {kw: frozenset(other for other in ordered if other in kw) for kw in ordered}
+    return pattern, hits
@@ -3,63 +3,50 @@ KakaoTalk Registry Info Extractor
 Extracts UUID, ModelName, SerialNumber from Windows Registry
 """
 import winreg
+import heapq
 import os
 import sys
-from typing import Optional, Dict, List
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
 
+# Strips "{", "}" and "-" from interface GUIDs in one pass
+_GUID_STRIP = str.maketrans('', '', '{}-')
+
+# Lowercased DeviceInfo registry value name -> result key.
+# Registry value names are case-insensitive, so lookups use name.lower().
+_DEVICE_VALUES = {"sys_uuid": "uuid", "hdd_model": "model", "hdd_serial": "serial"}
+
+
+@lru_cache(maxsize=1)
 def get_kakaotalk_device_info() -> Optional[Dict[str, str]]:
     """
     Get KakaoTalk device info from registry.
     Location: HKEY_CURRENT_USER\\Software\\Kakao\\KakaoTalk\\DeviceInfo\\{timestamp}
     """
     try:
-        base_key = winreg.OpenKey(
+        with winreg.OpenKey(
             winreg.HKEY_CURRENT_USER,
-            r"Software\Kakao\KakaoTalk\DeviceInfo"
-        )
-
-        # Find the timestamp subfolder
-        i = 0
-        device_key_name = None
-        while True:
-            try:
-                subkey_name = winreg.EnumKey(base_key, i)
-                device_key_name = subkey_name
-                break
-            except OSError:
-                break
-            i += 1
-
-        if not device_key_name:
-            return None
-
-        device_key = winreg.OpenKey(base_key, device_key_name)
-
-        # Read values
-        result = {"device_key": device_key_name}
-
-        try:
-            uuid_value, _ = winreg.QueryValueEx(device_key, "sys_uuid")
-            result["uuid"] = uuid_value
-        except FileNotFoundError:
-            pass
-
-        try:
-            model_value, _ = winreg.QueryValueEx(device_key, "hdd_model")
-            result["model"] = model_value
-        except FileNotFoundError:
-            pass
-
-        try:
-            serial_value, _ = winreg.QueryValueEx(device_key, "hdd_serial")
-            result["serial"] = serial_value
-        except FileNotFoundError:
-            pass
-
-        winreg.CloseKey(device_key)
-        winreg.CloseKey(base_key)
+            r"Software\Kakao\KakaoTalk\DeviceInfo",
+            0, winreg.KEY_READ,
+        ) as base_key:
+            # Find the timestamp subfolder (the first one)
+            if winreg.QueryInfoKey(base_key)[0] == 0:
+                return None
+            device_key_name = winreg.EnumKey(base_key, 0)
+
+            with winreg.OpenKey(base_key, device_key_name, 0, winreg.KEY_READ) as device_key:
+                # Read values in a single enumeration pass
+                result = {"device_key": device_key_name}
+
+                n_values = winreg.QueryInfoKey(device_key)[1]
+                for i in range(n_values):
+                    name, value, _ = winreg.EnumValue(device_key, i)
+                    field = _DEVICE_VALUES.get(name.lower())
+                    if field:
+                        result[field] = value
 
         return result
 
@@ -68,38 +55,48 @@ def get_kakaotalk_device_info() -> Optional[Dict[str, str]]:
         return None
 
 
-def get_network_interface_keys() -> List[str]:
+@lru_cache(maxsize=1)
+def get_network_interface_keys() -> Tuple[str, ...]:
     """
     Get network interface GUIDs from registry.
     These are used to generate the encryption key.
     Location: HKLM\\System\\CurrentControlSet\\Services\\Tcpip\\Parameters\\Interfaces
+
+    Read once per process; returned as a tuple so the cached value
+    can't be mutated by callers.
     """
     keys = []
     try:
-        base_key = winreg.OpenKey(
+        with winreg.OpenKey(
             winreg.HKEY_LOCAL_MACHINE,
-            r"System\CurrentControlSet\Services\Tcpip\Parameters\Interfaces"
-        )
-
-        i = 0
-        while True:
-            try:
-                subkey_name = winreg.EnumKey(base_key, i)
+            r"System\CurrentControlSet\Services\Tcpip\Parameters\Interfaces",
+            0, winreg.KEY_READ,
+        ) as base_key:
+            # Subkey count up front instead of enumerating until OSError
+            n_subkeys = winreg.QueryInfoKey(base_key)[0]
+            for i in range(n_subkeys):
                 # Remove curly braces and dashes
-                clean_key = subkey_name.replace("{", "").replace("}", "").replace("-", "")
-                keys.append(clean_key)
-                i += 1
-            except OSError:
-                break
-
-        winreg.CloseKey(base_key)
+                keys.append(winreg.EnumKey(base_key, i).translate(_GUID_STRIP))
 
     except Exception as e:
         print(f"Error reading network interfaces: {e}", file=sys.stderr)
 
-    return keys
+    return tuple(keys)
 
 
+def invalidate_registry_caches() -> None:
+    """
+    Drop memoized registry reads (network interfaces, device info) and
+    the user/chat_data directory lookups, which also memoize a None
+    result from before KakaoTalk created them.
+    """
+    get_network_interface_keys.cache_clear()
+    get_kakaotalk_device_info.cache_clear()
+    get_kakaotalk_user_dir.cache_clear()
+    get_chat_data_path.cache_clear()
+
+
+@lru_cache(maxsize=1)
 def get_kakaotalk_user_dir() -> Optional[str]:
     """
     Get the KakaoTalk user directory path.
@@ -111,17 +108,21 @@ def get_kakaotalk_user_dir() -> Optional[str]:
 
     kakao_users_path = Path(local_appdata) / "Kakao" / "KakaoTalk" / "users"
 
-    if not kakao_users_path.exists():
+    # Find user directory (there should be one hash-named folder).
+    # DirEntry carries the file type from the directory read, so
+    # is_dir() needs no extra stat.
+    try:
+        with os.scandir(kakao_users_path) as it:
+            for entry in it:
+                if len(entry.name) == 40 and entry.is_dir(follow_symlinks=False):  # SHA1 hash length
+                    return entry.path
+    except FileNotFoundError:
         return None
 
-    # Find user directory (there should be one hash-named folder)
-    for item in kakao_users_path.iterdir():
-        if item.is_dir() and len(item.name) == 40:  # SHA1 hash length
-            return str(item)
-
     return None
 
 
+@lru_cache(maxsize=1)
 def get_chat_data_path() -> Optional[str]:
     """
     Get the chat_data directory path.
@@ -137,36 +138,54 @@ def get_chat_data_path() -> Optional[str]:
     return None
 
 
-def list_chat_files() -> List[Dict[str, any]]:
+_by_modified = itemgetter("modified")
+
+
+def list_chat_files(limit: Optional[int] = None) -> List[Dict[str, any]]:
     """
-    List all chatLogs_*.edb files with their info.
+    List chatLogs_*.edb files with their info, most recently modified first.
+    With `limit`, only the `limit` most recent files are returned
+    (heap selection instead of sorting every file).
+    The directory is rescanned on every call: writes to an existing chat
+    log change its size and mtime but not the directory's mtime.
     """
     chat_data = get_chat_data_path()
     if not chat_data:
         return []
 
+    try:
+        chat_files = _scan_chat_files(chat_data)
+    except OSError:
+        return []
+
+    if limit is None:
+        chat_files.sort(key=_by_modified, reverse=True)
+        return chat_files
+    return heapq.nlargest(limit, chat_files, key=_by_modified)
+
+
+def _scan_chat_files(chat_data: str) -> List[Dict[str, any]]:
+    """
+    Scan chat_data for chatLogs_*.edb files (unsorted).
+    """
     chat_files = []
-    chat_data_path = Path(chat_data)
-
-    for file in chat_data_path.glob("chatLogs_*.edb"):
-        # Skip WAL and SHM files
-        if file.suffix in [".edb-wal", ".edb-shm"]:
-            continue
-        if "-wal" in file.name or "-shm" in file.name:
-            continue
-
-        chat_id = file.stem.replace("chatLogs_", "")
-        stat = file.stat()
-
-        chat_files.append({
-            "path": str(file),
-            "chat_id": chat_id,
-            "size": stat.st_size,
-            "modified": stat.st_mtime,
-        })
-
-    # Sort by modification time (most recent first)
-    chat_files.sort(key=lambda x: x["modified"], reverse=True)
+
+    with os.scandir(chat_data) as it:
+        for entry in it:
+            name = entry.name
+            # endswith(".edb") already excludes .edb-wal / .edb-shm sidecars
+            if not (name.startswith("chatLogs_") and name.endswith(".edb")):
+                continue
+
+            chat_id = name[len("chatLogs_"):-len(".edb")]
+            stat = entry.stat()  # Cached from the directory read on Windows
+
+            chat_files.append({
+                "path": entry.path,
+                "chat_id": chat_id,
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+            })
 
     return chat_files
 
@@ -4,8 +4,9 @@ World's First KakaoTalk Message Analyzer MCP
 Extract todos from KakaoTalk conversations by friend name or chat room name
 """
 import asyncio
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime
 from typing import Any, Sequence
@@ -14,6 +15,7 @@ from typing import Any, Sequence
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import orjson
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -47,6 +49,25 @@ except ImportError:
 # Initialize server
 app = Server("kakaotalk-mcp")
 
+# Max chats scanned concurrently by get_urgent_todos
+URGENT_TODO_WORKERS = 8
+
+# Shared by all get_urgent_todos calls; threads start on first use
+_urgent_executor = ThreadPoolExecutor(
+    max_workers=URGENT_TODO_WORKERS, thread_name_prefix="urgent-todos"
+)
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize a tool response as indented JSON (UTF-8, non-ASCII kept as is).
+    Values orjson can't encode natively fall back to str().
+    """
+    return orjson.dumps(
+        obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
 # Global instances (lazy initialization)
 _decryptor = None
 _chat_manager = None
@@ -216,6 +237,15 @@ async def list_tools() -> list[Tool]:
                 "required": [],
             },
         ),
+        Tool(
+            name="clear_cache",
+            description="캐시 초기화. 채팅방 목록/이름, 복호화된 파일, 할일 추출 결과 캐시를 비우고 다음 호출 시 새로 읽음",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+                "required": [],
+            },
+        ),
     ]
 
 
@@ -261,6 +291,9 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> Sequence[TextConten
             chat_limit = arguments.get("chat_limit", 10)
             return await handle_get_urgent_todos(chat_limit)
 
+        elif name == "clear_cache":
+            return await handle_clear_cache()
+
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
@@ -288,7 +321,7 @@ async def handle_status() -> Sequence[TextContent]:
 
     return [TextContent(
         type="text",
-        text=json.dumps(status, ensure_ascii=False, indent=2)
+        text=_dumps(status)
     )]
 
 
@@ -299,12 +332,12 @@ async def handle_list_chats(limit: int) -> Sequence[TextContent]:
 
     result = {
         "total": len(chats),
-        "chats": chats,
+        "chats": [asdict(c) for c in chats],
     }
 
     return [TextContent(
         type="text",
-        text=json.dumps(result, ensure_ascii=False, indent=2)
+        text=_dumps(result)
     )]
 
 
@@ -315,12 +348,12 @@ async def handle_search_chat(name: str, exact: bool) -> Sequence[TextContent]:
 
     return [TextContent(
         type="text",
-        text=json.dumps({
+        text=_dumps({
             "query": name,
             "exact_match": exact,
             "found": len(results),
-            "results": results,
-        }, ensure_ascii=False, indent=2)
+            "results": [asdict(c) for c in results],
+        })
     )]
 
 
@@ -331,11 +364,11 @@ async def handle_get_messages(chat_id: str, limit: int) -> Sequence[TextContent]
 
     return [TextContent(
         type="text",
-        text=json.dumps({
+        text=_dumps({
             "chat_id": chat_id,
             "message_count": len(messages),
-            "messages": messages[:limit],
-        }, ensure_ascii=False, indent=2)
+            "messages": [dict(m) for m in messages[:limit]],
+        })
     )]
 
 
@@ -347,19 +380,18 @@ async def handle_extract_todos(chat_id: str, limit: int) -> Sequence[TextContent
     todos = extractor.extract_todos_from_chat(manager, chat_id, limit)
 
     # Separate urgent and normal todos
-    urgent = [t for t in todos if t.get("is_urgent")]
-    normal = [t for t in todos if not t.get("is_urgent")]
+    urgent, normal = extractor.partition_by_urgency(todos)
 
     return [TextContent(
         type="text",
-        text=json.dumps({
+        text=_dumps({
             "chat_id": chat_id,
             "total_todos": len(todos),
             "urgent_count": len(urgent),
             "normal_count": len(normal),
             "urgent_todos": urgent,
             "normal_todos": normal,
-        }, ensure_ascii=False, indent=2)
+        })
     )]
 
 
@@ -371,9 +403,7 @@ async def handle_extract_todos_by_name(name: str, limit: int) -> Sequence[TextCo
     result = extractor.search_and_extract_todos(manager, name, limit)
 
     if result.get("success"):
-        todos = result.get("todos", [])
-        urgent = [t for t in todos if t.get("is_urgent")]
-        normal = [t for t in todos if not t.get("is_urgent")]
+        urgent, normal = extractor.partition_by_urgency(result.get("todos", []))
 
         result["urgent_count"] = len(urgent)
         result["normal_count"] = len(normal)
@@ -382,7 +412,7 @@ async def handle_extract_todos_by_name(name: str, limit: int) -> Sequence[TextCo
 
     return [TextContent(
         type="text",
-        text=json.dumps(result, ensure_ascii=False, indent=2)
+        text=_dumps(result)
     )]
 
 
@@ -393,12 +423,12 @@ async def handle_search_messages(chat_id: str, keyword: str, limit: int) -> Sequ
 
     return [TextContent(
         type="text",
-        text=json.dumps({
+        text=_dumps({
             "chat_id": chat_id,
             "keyword": keyword,
             "found": len(results),
             "messages": results,
-        }, ensure_ascii=False, indent=2)
+        })
     )]
 
 
@@ -410,25 +440,53 @@ async def handle_get_urgent_todos(chat_limit: int) -> Sequence[TextContent]:
     recent_chats = manager.get_recent_chats(chat_limit)
     all_urgent = []
 
-    for chat in recent_chats:
-        todos = extractor.extract_todos_from_chat(manager, chat["chat_id"], limit=200)
+    # Each chat decrypts and queries its own EDB file, so run them side by side.
+    # A chat that fails is reported and skipped instead of failing the tool.
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(
+            _urgent_executor, extractor.extract_todos_from_chat, manager, chat.chat_id, 200
+        )
+        for chat in recent_chats
+    ), return_exceptions=True)
+
+    for chat, todos in zip(recent_chats, results):
+        if isinstance(todos, BaseException):
+            print(f"Error extracting todos from chat {chat.chat_id}: {todos}", file=sys.stderr)
+            continue
+
         urgent = [t for t in todos if t.get("is_urgent")]
 
+        # Todo dicts may be shared with the extractor's cache; copy, don't mutate
         for todo in urgent:
-            todo["chat_name"] = chat.get("name", chat["chat_id"])
-            todo["chat_id"] = chat["chat_id"]
-            all_urgent.append(todo)
+            all_urgent.append({
+                **todo,
+                "chat_name": chat.name or chat.chat_id,
+                "chat_id": chat.chat_id,
+            })
 
     # Sort by timestamp (most recent first)
     all_urgent.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
 
     return [TextContent(
         type="text",
-        text=json.dumps({
+        text=_dumps({
             "chats_checked": chat_limit,
             "total_urgent": len(all_urgent),
             "urgent_todos": all_urgent,
-        }, ensure_ascii=False, indent=2)
+        })
+    )]
+
+
+async def handle_clear_cache() -> Sequence[TextContent]:
+    """Clear cached chat data."""
+    manager = get_chat_manager()
+    manager.invalidate()
+    get_todo_extractor().clear_cache()
+
+    return [TextContent(
+        type="text",
+        text=_dumps({"cleared": True})
     )]
 
 
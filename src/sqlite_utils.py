@@ -0,0 +1,37 @@
+"""
+KakaoTalk SQLite Helpers
+Shared connection setup for reading decrypted / local SQLite databases
+"""
+import sqlite3
+from pathlib import Path
+
+
+# Applied right after every connect.
+# journal_mode=WAL is a no-op on read-only (immutable) opens,
+# but mmap_size / cache_size still apply.
+CONNECTION_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+"""
+
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Apply the tuning pragma batch to a connection.
+    """
+    conn.executescript(CONNECTION_PRAGMAS)
+    return conn
+
+
+def connect_readonly(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a SQLite database read-only with the immutable flag.
+    SQLite skips its locking protocol entirely, so no copy is needed
+    to avoid lock contention.
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+    return configure_connection(conn)
@@ -5,11 +5,51 @@ Parses exported chat history from KakaoTalk app
 
 This is a simpler approach that doesn't require decryption!
 """
+import codecs
 import re
 import os
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, FrozenSet
+
+from .keywords import COMMON_TODO_KEYWORDS, COMMON_URGENT_KEYWORDS, build_keyword_matcher
+
+
+# Max number of parsed export files kept in memory. Exports can be
+# hundreds of MB, so only the most recent couple are memoized.
+PARSE_CACHE_SIZE = 2
+
+# English month name -> month number
+_MONTHS = {
+    'January': 1, 'February': 2, 'March': 3,
+    'April': 4, 'May': 5, 'June': 6,
+    'July': 7, 'August': 8, 'September': 9,
+    'October': 10, 'November': 11, 'December': 12
+}
+
+
+def _detect_encoding(file_path: Path) -> str:
+    """
+    Pick the export file's encoding from a small head sniff:
+    BOM first, then UTF-8 if the head decodes, else CP949.
+    An ASCII-only head can't tell UTF-8 from CP949, so a 'utf-8'
+    result is only a first guess; see _parse_file_impl.
+    """
+    with open(file_path, 'rb') as fb:
+        head = fb.read(4096)
+
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    try:
+        # Incremental decoder tolerates a multi-byte char cut at the end
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp949'
 
 
 class KakaoTxtParser:
@@ -41,11 +81,38 @@ class KakaoTxtParser:
         r'\[([^\]]+)\]\s*\[([^\]]+)\]\s*(.*)'
     )
 
+    # Date (KR) | date (EN) | message, anchored at each line start.
+    # Same patterns as above, with whitespace kept within a single line.
+    LINE_PATTERN = re.compile(
+        r'(?m)^[^\S\n]*(?:'
+        r'-+[^\S\n]*(?P<kr_year>\d{4})년[^\S\n]*(?P<kr_month>\d{1,2})월[^\S\n]*'
+        r'(?P<kr_day>\d{1,2})일[^\S\n]*\w+[^\S\n]*-+'
+        r'|-+[^\S\n]*\w+,[^\S\n]*(?P<en_month>\w+)[^\S\n]+(?P<en_day>\d{1,2}),'
+        r'[^\S\n]*(?P<en_year>\d{4})[^\S\n]*-+'
+        r'|\[(?P<sender>[^\]\n]+)\][^\S\n]*\[(?P<time>[^\]\n]+)\][^\S\n]*(?P<body>.*)'
+        r')'
+    )
+
     # System message pattern (no sender)
     SYSTEM_PATTERN = re.compile(
         r'^[^\[].+$'
     )
 
+    # Todo keywords
+    TODO_KEYWORDS = [*COMMON_TODO_KEYWORDS, "처리", "진행", "완료해"]
+
+    URGENT_KEYWORDS = [*COMMON_URGENT_KEYWORDS, "지금"]
+
+    # Single matcher over both keyword sets, built once. Nested keywords
+    # ("완료" in "완료해") and overlapping ones are all reported.
+    KEYWORD_RE, _KEYWORD_HITS = build_keyword_matcher(TODO_KEYWORDS + URGENT_KEYWORDS)
+
+    # Set views for membership tests; _TODO_ORDER keeps reported keywords
+    # in TODO_KEYWORDS order.
+    _TODO_SET = frozenset(TODO_KEYWORDS)
+    _URGENT_SET = frozenset(URGENT_KEYWORDS)
+    _TODO_ORDER = {kw: i for i, kw in enumerate(TODO_KEYWORDS)}
+
     def __init__(self):
         self.messages = []
         self.participants = set()
@@ -54,68 +121,18 @@ class KakaoTxtParser:
     def parse_file(self, file_path: str) -> Dict:
         """
         Parse a KakaoTalk export .txt file.
+        Unchanged files (same path, mtime and size) are not re-parsed;
+        each call still gets its own message dicts.
         """
-        self.messages = []
-        self.participants = set()
-
         file_path = Path(file_path)
         self.chat_name = file_path.stem
 
-        # Try different encodings
-        content = None
-        for encoding in ['utf-8', 'cp949', 'euc-kr', 'utf-16']:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                break
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-
-        if content is None:
-            return {"error": "Could not decode file"}
-
-        current_date = None
-        lines = content.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Check for date line
-            date_match = self.DATE_PATTERN_KR.match(line)
-            if date_match:
-                year, month, day = date_match.groups()
-                current_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                continue
-
-            date_match_en = self.DATE_PATTERN_EN.match(line)
-            if date_match_en:
-                month_name, day, year = date_match_en.groups()
-                # Convert month name to number
-                months = {
-                    'January': '01', 'February': '02', 'March': '03',
-                    'April': '04', 'May': '05', 'June': '06',
-                    'July': '07', 'August': '08', 'September': '09',
-                    'October': '10', 'November': '11', 'December': '12'
-                }
-                month = months.get(month_name, '01')
-                current_date = f"{year}-{month}-{day.zfill(2)}"
-                continue
-
-            # Check for message
-            msg_match = self.MESSAGE_PATTERN.match(line)
-            if msg_match:
-                sender, time_str, content = msg_match.groups()
-                self.participants.add(sender)
-
-                self.messages.append({
-                    "sender": sender,
-                    "time": time_str,
-                    "date": current_date,
-                    "content": content,
-                    "raw": line,
-                })
+        stat = os.stat(file_path)
+        messages, participants = _parse_file_impl(
+            os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+        )
+        self.messages = list(map(dict.copy, messages))
+        self.participants = set(participants)
 
         return {
             "chat_name": self.chat_name,
@@ -132,25 +149,6 @@ class KakaoTxtParser:
         if messages is None:
             messages = self.messages
 
-        # Todo keywords
-        TODO_KEYWORDS = [
-            "해야", "해줘", "해주세요", "부탁", "요청",
-            "할 일", "할일", "TODO", "todo",
-            "까지", "마감", "deadline",
-            "확인", "검토", "리뷰",
-            "보내", "전달", "공유",
-            "작성", "준비", "완료",
-            "미팅", "회의", "콜",
-            "연락", "답장", "회신",
-            "수정", "변경", "업데이트",
-            "처리", "진행", "완료해",
-        ]
-
-        URGENT_KEYWORDS = [
-            "급", "빨리", "ASAP", "asap", "긴급",
-            "오늘", "내일", "당장", "바로", "지금",
-        ]
-
         todos = []
 
         for msg in messages:
@@ -158,14 +156,20 @@ class KakaoTxtParser:
             if not content:
                 continue
 
-            # Check for todo keywords
-            matched_keywords = [kw for kw in TODO_KEYWORDS if kw in content]
+            # One pass finds every todo + urgent keyword
+            hits = self.KEYWORD_RE.findall(content)
+            if not hits:
+                continue
+
+            found = set().union(*map(self._KEYWORD_HITS.__getitem__, hits))
 
-            if not matched_keywords:
+            todo_hits = found & self._TODO_SET
+            if not todo_hits:
                 continue
+            matched_keywords = sorted(todo_hits, key=self._TODO_ORDER.__getitem__)
 
             # Check urgency
-            is_urgent = any(kw in content for kw in URGENT_KEYWORDS)
+            is_urgent = not found.isdisjoint(self._URGENT_SET)
 
             todos.append({
                 "content": content,
@@ -195,6 +199,72 @@ class KakaoTxtParser:
         ]
 
 
+def _parse_lines(lines) -> Tuple[Tuple[Dict, ...], FrozenSet[str]]:
+    """
+    Parse export lines into (messages, participants).
+
+    This is the hot loop for large exports. Lookups are bound to locals
+    and message lines, the common case, are tested first; the per-line
+    work left is a single regex match plus a few C-level string calls.
+    """
+    messages = []
+    add_message = messages.append
+    participants = set()
+    add_participant = participants.add
+    match_line = KakaoTxtParser.LINE_PATTERN.match
+    month_of = _MONTHS.get
+    current_date = None
+
+    for line in lines:
+        match = match_line(line)
+        if not match:
+            continue
+
+        sender, time, body = match.group("sender", "time", "body")
+        if sender is not None:
+            add_participant(sender)
+            add_message({
+                "sender": sender,
+                "time": time,
+                "date": current_date,
+                "content": body.rstrip(),
+                "raw": match.group(0).strip(),
+            })
+            continue
+
+        if match.group("kr_year"):
+            y, mo, d = map(int, match.group("kr_year", "kr_month", "kr_day"))
+        else:
+            y, d = map(int, match.group("en_year", "en_day"))
+            mo = month_of(match.group("en_month"), 1)
+        current_date = f"{y:04d}-{mo:02d}-{d:02d}"
+
+    return tuple(messages), frozenset(participants)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_file_impl(path_str: str, mtime_ns: int, size: int) -> Tuple[Tuple[Dict, ...], FrozenSet[str]]:
+    """
+    Parse an export file into (messages, participants); see _parse_lines.
+    Memoized on (path, mtime_ns, size); the stat fields only form the cache key.
+    The cached message dicts are shared, so callers must copy them.
+    """
+    encoding = _detect_encoding(path_str)
+
+    # Stream line by line so only one line is resident at a time.
+    # UTF-8 is decoded strictly: a CP949 file whose head was pure ASCII
+    # fails later on and is parsed again from the start as CP949.
+    try:
+        with open(path_str, 'r', encoding=encoding) as f:
+            return _parse_lines(f)
+    except UnicodeDecodeError:
+        if encoding != 'utf-8':
+            raise
+
+    with open(path_str, 'r', encoding='cp949', errors='replace') as f:
+        return _parse_lines(f)
+
+
 def scan_export_folder(folder_path: str) -> List[Dict]:
     """
     Scan a folder for KakaoTalk export .txt files.